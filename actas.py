@@ -0,0 +1,140 @@
+"""
+Línea de comandos para tareas sin Streamlit.
+
+Uso:
+    python -m actas export hallazgos.parquet --formato parquet --cedis Toluca --estatus Abierto
+    python -m actas ingest /ruta/compartida/actas [--watch --intervalo 300] [--workers 4]
+    python -m actas ocr-bench acta_escaneada.pdf [--sin-deskew] [--sin-recorte]
+    python -m actas archive --dias 365 [--lote 500]
+    python -m actas sync {nodo,export,apply,local,conflictos} ...  (ver sync.py)
+"""
+import argparse
+import sys
+import database
+
+def cmd_export(args):
+    filters = {
+        "cedis": args.cedis,
+        "riesgo": args.riesgo,
+        "estatus": args.estatus,
+    }
+    total = database.export_findings(args.destino, args.formato, filters=filters, batch_size=args.lote,
+                                     include_archive=args.historico)
+    print(f"Exportados {total} registros a {args.destino}")
+    return 0
+
+def cmd_ingest(args):
+    # Import diferido: el parseo requiere pdfplumber/docx/easyocr
+    import ingest
+    if args.watch:
+        ingest.watch_dir(args.carpeta, interval=args.intervalo, workers=args.workers)
+    else:
+        archivos, registros = ingest.ingest_dir(args.carpeta, workers=args.workers)
+        print(f"Procesados {archivos} archivos, {registros} registros nuevos")
+    return 0
+
+def cmd_ocr_bench(args):
+    import file_parser
+    config = {
+        "dpi": args.dpi,
+        "deskew": not args.sin_deskew,
+        "crop_table": not args.sin_recorte,
+    }
+    df = file_parser.benchmark_ocr(args.pdf, config)
+    print(df.round(2).to_string(index=False))
+    print(f"Aceleración total: {df['total_original'].sum() / df['total'].sum():.1f}x")
+    return 0
+
+def cmd_archive(args):
+    moved = database.archive_closed(age_days=args.dias, batch_size=args.lote)
+    activos, archivados = database.archive_stats()
+    print(f"Archivados {moved} registros ({activos} activos, {archivados} en archivo)")
+    return 0
+
+def cmd_sync(args):
+    import sync
+    if args.accion == "nodo":
+        print(sync.node_id(nuevo=args.nuevo))
+    elif args.accion == "export":
+        total = sync.export_delta(args.archivo_delta, args.para)
+        print(f"Exportadas {total} operaciones a {args.archivo_delta}")
+    elif args.accion == "apply":
+        resumen = sync.apply_delta(args.archivo_delta, args.estrategia)
+        print(", ".join(f"{v} {k}s" for k, v in resumen.items()))
+    elif args.accion == "local":
+        res_a, res_b = sync.sync_local(args.db_a, args.db_b, args.carpeta, args.estrategia)
+        print(f"{args.db_a}: " + ", ".join(f"{v} {k}s" for k, v in res_a.items()))
+        print(f"{args.db_b}: " + ", ".join(f"{v} {k}s" for k, v in res_b.items()))
+    elif args.accion == "conflictos":
+        df = sync.get_conflicts()
+        cols = ["id", "uuid", "motivo", "nodo", "fecha"]
+        print(df[cols].to_string(index=False) if not df.empty else "Sin conflictos pendientes")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="actas", description="Herramientas NOM-019 sin interfaz")
+    parser.add_argument("--db", default=database.DB_NAME, help="Ruta de la base SQLite")
+    parser.add_argument("--archivo", default=None, help="Ruta de la base de archivo (por defecto <db>_archivo.db)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_exp = sub.add_parser("export", help="Exporta hallazgos a Parquet, Arrow IPC o CSV")
+    p_exp.add_argument("destino", help="Archivo de salida")
+    p_exp.add_argument("--formato", choices=database.EXPORT_FORMATS, default="parquet")
+    p_exp.add_argument("--cedis", action="append", help="Filtrar por CEDIS (repetible)")
+    p_exp.add_argument("--riesgo", action="append", help="Filtrar por riesgo (repetible)")
+    p_exp.add_argument("--estatus", action="append", help="Filtrar por estatus (repetible)")
+    p_exp.add_argument("--lote", type=int, default=database.EXPORT_BATCH_SIZE, help="Filas por bloque")
+    p_exp.add_argument("--historico", action="store_true", help="Incluir hallazgos archivados")
+    p_exp.set_defaults(func=cmd_export)
+
+    p_ing = sub.add_parser("ingest", help="Importa actas PDF y matrices Excel nuevas de una carpeta")
+    p_ing.add_argument("carpeta", help="Carpeta a recorrer (recursiva)")
+    p_ing.add_argument("--workers", type=int, default=None, help="Procesos de parseo en paralelo")
+    p_ing.add_argument("--watch", action="store_true", help="Seguir revisando la carpeta periódicamente")
+    p_ing.add_argument("--intervalo", type=int, default=60, help="Segundos entre revisiones con --watch")
+    p_ing.set_defaults(func=cmd_ingest)
+
+    p_ocr = sub.add_parser("ocr-bench", help="Mide por página el OCR original contra el preprocesado")
+    p_ocr.add_argument("pdf", help="Acta escaneada")
+    p_ocr.add_argument("--dpi", type=int, default=300)
+    p_ocr.add_argument("--sin-deskew", action="store_true", help="No enderezar la página")
+    p_ocr.add_argument("--sin-recorte", action="store_true", help="No recortar a la tabla")
+    p_ocr.set_defaults(func=cmd_ocr_bench)
+
+    p_arc = sub.add_parser("archive", help="Mueve hallazgos cerrados antiguos a la base de archivo")
+    p_arc.add_argument("--dias", type=int, default=database.ARCHIVE_AGE_DAYS, help="Antigüedad mínima en días")
+    p_arc.add_argument("--lote", type=int, default=database.ARCHIVE_BATCH_SIZE, help="Filas por transacción")
+    p_arc.set_defaults(func=cmd_archive)
+
+    p_syn = sub.add_parser("sync", help="Sincroniza por deltas con otra copia de la base")
+    syn = p_syn.add_subparsers(dest="accion", required=True)
+    s_nodo = syn.add_parser("nodo", help="Muestra el identificador de esta base")
+    s_nodo.add_argument("--nuevo", action="store_true", help="Generar uno nuevo (tras copiar la base)")
+    s_exp = syn.add_parser("export", help="Escribe el delta pendiente para otro nodo")
+    s_exp.add_argument("archivo_delta")
+    s_exp.add_argument("--para", required=True, help="Nodo destino")
+    s_app = syn.add_parser("apply", help="Aplica un delta recibido")
+    s_app.add_argument("archivo_delta")
+    s_app.add_argument("--estrategia", choices=["lww", "marcar"], default="lww")
+    s_loc = syn.add_parser("local", help="Sincroniza dos archivos de base en ambos sentidos")
+    s_loc.add_argument("db_a")
+    s_loc.add_argument("db_b")
+    s_loc.add_argument("--carpeta", default=".", help="Dónde dejar los archivos delta")
+    s_loc.add_argument("--estrategia", choices=["lww", "marcar"], default="lww")
+    syn.add_parser("conflictos", help="Lista conflictos pendientes")
+    p_syn.set_defaults(func=cmd_sync)
+
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.comando == "sync" and args.accion == "local" and args.archivo:
+        parser.error("--archivo no aplica a 'sync local': cada base usa su propio <db>_archivo.db")
+    database.DB_NAME = args.db
+    database.ARCHIVE_DB_NAME = args.archivo
+    database.init_db()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@ from datetime import date
 import database
 import visualizations
 import file_parser
+import sync
 import io
 import os
 
@@ -64,7 +65,8 @@ def main():
 
 def show_dashboard():
     st.title("📊 Tablero de Cumplimiento")
-    df = database.get_findings()
+    historico = st.sidebar.checkbox("Incluir histórico archivado", help="Cerrados antiguos movidos al archivo")
+    df = database.get_findings(include_archive=historico)
     
     if df.empty:
         st.info("No hay datos para mostrar.")
@@ -199,6 +201,18 @@ def show_dashboard():
 
         st.download_button("📥 Descargar Reporte Ejecutivo", buffer, "Reporte_NOM019_Ejecutivo.xlsx")
 
+    # Exportación columnar para BI (respeta los filtros del tablero)
+    with st.expander("🗄️ Exportar Datos (Parquet / Arrow / CSV)"):
+        fmt = st.selectbox("Formato", database.EXPORT_FORMATS)
+        if st.button("Generar Exportación"):
+            buffer = io.BytesIO()
+            try:
+                total = database.export_findings(buffer, fmt, filters={"cedis": f_cedis, "riesgo": f_riesgo}, include_archive=historico)
+                ext = {"parquet": "parquet", "arrow": "arrows", "csv": "csv"}[fmt]
+                st.download_button(f"📥 Descargar {total} registros", buffer.getvalue(), f"hallazgos_NOM019.{ext}")
+            except Exception as e:
+                st.error(f"Error al exportar: {e}")
+
 def show_form():
     st.header("📝 Registro Manual Detallado")
     with st.form("entry_form", clear_on_submit=True):
@@ -257,9 +271,7 @@ def show_import():
                 st.write(f"Vista previa ({len(df)} registros):")
                 st.dataframe(df.head())
                 if st.button("Importar Excel"):
-                    count = 0 
-                    for _, row in df.iterrows():
-                        if database.add_finding(row.to_dict()): count += 1
+                    count = database.add_findings(row.to_dict() for _, row in df.iterrows())
                     st.success(f"Importados {count} registros.")
         
         elif ext == "pdf":
@@ -271,8 +283,7 @@ def show_import():
                     df_pdf = pd.DataFrame(findings)
                     edited = st.data_editor(df_pdf)
                     if st.button("Guardar Hallazgos del PDF"):
-                        for _, row in edited.iterrows():
-                            database.add_finding(row.to_dict())
+                        database.add_findings(row.to_dict() for _, row in edited.iterrows())
                         st.success("Guardados.")
                 else:
                     st.error("❌ No se pudieron extraer datos.")
@@ -287,7 +298,7 @@ def show_import():
 def show_management():
     st.header("🛠️ Gestión de Registros")
     
-    tab_edit, tab_del, tab_ver = st.tabs(["✏️ Editar Datos", "🗑️ Eliminar Registros", "📷 Ver Evidencia"])
+    tab_edit, tab_del, tab_ver, tab_arch, tab_sync = st.tabs(["✏️ Editar Datos", "🗑️ Eliminar Registros", "📷 Ver Evidencia", "🗄️ Archivo", "🔄 Sincronización"])
     
     df = database.get_findings()
     
@@ -363,5 +374,57 @@ def show_management():
         else:
             st.warning("La columna 'evidencia_path' no existe en la base de datos.")
 
+    with tab_arch:
+        st.markdown("### 🗄️ Archivo de Hallazgos Cerrados")
+        st.info("Mueve los hallazgos 'Cerrado' antiguos a la base de archivo. Siguen disponibles en el tablero con 'Incluir histórico archivado'.")
+        activos, archivados = database.archive_stats()
+        a1, a2 = st.columns(2)
+        a1.metric("Activos", activos)
+        a2.metric("Archivados", archivados)
+        dias = st.number_input("Antigüedad mínima (días)", min_value=0, value=database.ARCHIVE_AGE_DAYS, step=30)
+        if st.button("🗄️ Archivar Cerrados"):
+            moved = database.archive_closed(age_days=int(dias))
+            st.success(f"Archivados {moved} registros.")
+            st.rerun()
+
+    with tab_sync:
+        st.markdown("### 🔄 Sincronización con otra copia de la base")
+        st.write(f"**Identificador de esta base:** `{sync.node_id()}`")
+        with st.expander("¿Esta base es una copia de otra?"):
+            st.caption("Dos bases con el mismo identificador no pueden sincronizarse entre sí. "
+                       "Si copiaste el archivo de la base, genera un identificador nuevo en la copia.")
+            if st.button("Regenerar Identificador"):
+                st.success(f"Nuevo identificador: {sync.node_id(nuevo=True)}")
+                st.rerun()
+        
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown("**Enviar cambios**")
+            para = st.text_input("Identificador de la base destino")
+            if st.button("Generar Delta") and para:
+                buffer = io.BytesIO()
+                total = sync.export_delta(buffer, para.strip())
+                st.download_button(f"📥 Descargar delta ({total} cambios)", buffer.getvalue(), f"delta_{para.strip()[:8]}.jsonl.gz")
+        with c2:
+            st.markdown("**Recibir cambios**")
+            delta = st.file_uploader("Archivo delta", type=["gz"])
+            estrategia = st.radio("Si ambos lados editaron el mismo registro", ["lww", "marcar"],
+                                  format_func=lambda x: "Gana el más reciente" if x == "lww" else "Marcar conflicto")
+            if delta and st.button("Aplicar Delta"):
+                try:
+                    resumen = sync.apply_delta(delta, estrategia)
+                    st.success(f"Aplicados {resumen['aplicada']}, omitidos {resumen['omitida']}, conflictos {resumen['conflicto']}.")
+                except Exception as e:
+                    st.error(f"Error aplicando delta: {e}")
+        
+        conflictos = sync.get_conflicts()
+        if not conflictos.empty:
+            st.warning(f"⚠️ {len(conflictos)} conflictos pendientes de revisión.")
+            st.dataframe(conflictos[["id", "uuid", "motivo", "nodo", "fecha", "local", "remoto"]])
+            resueltos = st.multiselect("Marcar como resueltos:", conflictos['id'].tolist())
+            if st.button("Marcar Resueltos") and resueltos:
+                sync.resolve_conflicts(resueltos)
+                st.rerun()
+
 if __name__ == "__main__":
     main()
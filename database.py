@@ -1,71 +1,252 @@
+import os
 import sqlite3
+import uuid
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
 
 DB_NAME = "nom019.db"
 
+# --- ARCHIVO (hallazgos cerrados antiguos) ---
+# None = mismo nombre que DB_NAME con sufijo _archivo (nom019_archivo.db)
+ARCHIVE_DB_NAME = None
+ARCHIVE_AGE_DAYS = 365
+ARCHIVE_BATCH_SIZE = 500
+# Fecha para la antigüedad: fecha_hallazgo si es una fecha ISO válida; si viene vacía
+# o como texto libre (p. ej. '15/09/2026' de un acta PDF), se usa fecha_registro.
+ARCHIVE_DATE_SQL = "COALESCE(date(NULLIF(fecha_hallazgo, '')), date(fecha_registro))"
+
+# --- EXPORTACIÓN ---
+EXPORT_FORMATS = ["parquet", "arrow", "csv"]
+EXPORT_BATCH_SIZE = 5000
+# Columnas de baja cardinalidad: se guardan con dictionary encoding
+CATEGORICAL_COLS = ["numero_sesion", "cedis", "estado_geo", "tipo_hallazgo", "riesgo", "responsable", "estatus"]
+
+HALLAZGOS_SCHEMA = '''
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    numero_sesion TEXT,
+    fecha_hallazgo DATE,
+    cedis TEXT,
+    estado_geo TEXT, 
+    hallazgo TEXT,
+    tipo_hallazgo TEXT, 
+    riesgo TEXT, 
+    acciones_inmediatas TEXT,
+    fecha_compromiso DATE,
+    responsable TEXT,
+    estatus TEXT,
+    evidencia_path TEXT,
+    fecha_registro TIMESTAMP,
+    uuid TEXT,
+    version INTEGER,
+    modificado_por TEXT,
+    modificado_en TIMESTAMP
+'''
+
+# --- SINCRONIZACIÓN (ver sync.py) ---
+# Columnas de negocio que viajan en la bitácora de cambios (hallazgos_ops)
+DATA_COLS = ["numero_sesion", "fecha_hallazgo", "cedis", "estado_geo", "hallazgo", "tipo_hallazgo",
+             "riesgo", "acciones_inmediatas", "fecha_compromiso", "responsable", "estatus",
+             "evidencia_path", "fecha_registro"]
+SYNC_COLS = ["uuid", "version", "modificado_por", "modificado_en"]
+NOW_SQL = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+NODE_SQL = "(SELECT valor FROM sync_estado WHERE clave = 'nodo')"
+
 def init_db():
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS hallazgos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            numero_sesion TEXT,
-            fecha_hallazgo DATE,
-            cedis TEXT,
-            estado_geo TEXT, 
-            hallazgo TEXT,
-            tipo_hallazgo TEXT, 
-            riesgo TEXT, 
-            acciones_inmediatas TEXT,
-            fecha_compromiso DATE,
-            responsable TEXT,
-            estatus TEXT,
-            evidencia_path TEXT,
-            fecha_registro TIMESTAMP
-        )
-    ''')
+    c.execute(f"CREATE TABLE IF NOT EXISTS hallazgos ({HALLAZGOS_SCHEMA})")
     try:
         c.execute("ALTER TABLE hallazgos ADD COLUMN riesgo TEXT")
     except: pass
     try:
         c.execute("ALTER TABLE hallazgos ADD COLUMN estado_geo TEXT")
     except: pass
+    _init_sync(c)
+    # Acelera la verificación de duplicados (hallazgo + fecha + CEDIS)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_hallazgos_dup ON hallazgos (hallazgo, fecha_hallazgo, cedis)")
+    
+    # Manifiesto de archivos ya procesados por la ingesta en lote
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_manifest (
+            path TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime REAL,
+            sha256 TEXT,
+            registros INTEGER,
+            error TEXT,
+            fecha_proceso TIMESTAMP
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_manifest_sha ON ingest_manifest (sha256)")
     
     conn.commit()
     conn.close()
 
+def _add_sync_columns(c, schema="main"):
+    cols = {r[1] for r in c.execute(f"PRAGMA {schema}.table_info(hallazgos)")}
+    for col, tipo in [("uuid", "TEXT"), ("version", "INTEGER"), ("modificado_por", "TEXT"), ("modificado_en", "TIMESTAMP")]:
+        if col not in cols:
+            c.execute(f"ALTER TABLE {schema}.hallazgos ADD COLUMN {col} {tipo}")
+    c.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {schema}.idx_hallazgos_uuid ON hallazgos (uuid)")
+
+def _init_sync(c):
+    """
+    Bitácora de cambios para sincronizar copias de la base:
+    - cada hallazgo tiene uuid estable, version y quién/cuándo lo modificó;
+    - los triggers escriben cada alta/cambio/baja en hallazgos_ops (solo se agrega).
+    """
+    _add_sync_columns(c)
+    c.execute("CREATE TABLE IF NOT EXISTS sync_estado (clave TEXT PRIMARY KEY, valor TEXT)")
+    c.execute(f"INSERT OR IGNORE INTO sync_estado VALUES ('nodo', '{uuid.uuid4().hex}')")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS hallazgos_ops (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            uuid TEXT,
+            op TEXT,
+            version INTEGER,
+            version_base INTEGER,
+            nodo TEXT,
+            fecha TIMESTAMP,
+            datos TEXT,
+            base_nodo TEXT,
+            base_fecha TIMESTAMP
+        )
+    ''')
+    # base_nodo/base_fecha: quién y cuándo escribió la versión sobre la que se hizo el cambio
+    ops_cols = {r[1] for r in c.execute("PRAGMA table_info(hallazgos_ops)")}
+    if "base_fecha" not in ops_cols:
+        c.execute("ALTER TABLE hallazgos_ops ADD COLUMN base_nodo TEXT")
+        c.execute("ALTER TABLE hallazgos_ops ADD COLUMN base_fecha TIMESTAMP")
+        for trigger in ("hallazgos_ops_update", "hallazgos_ops_insert", "hallazgos_ops_delete"):
+            c.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ops_uuid ON hallazgos_ops (uuid)")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sync_conflictos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            uuid TEXT,
+            motivo TEXT,
+            local TEXT,
+            remoto TEXT,
+            nodo TEXT,
+            fecha TIMESTAMP,
+            resuelto INTEGER DEFAULT 0
+        )
+    ''')
+
+    # Registros anteriores a la bitácora: uuid determinístico, para que dos copias
+    # del mismo archivo asignen el mismo uuid al mismo hallazgo.
+    pendientes = c.execute(
+        "SELECT id, hallazgo, fecha_hallazgo, cedis, fecha_registro FROM hallazgos WHERE uuid IS NULL"
+    ).fetchall()
+    for r in pendientes:
+        uid = uuid.uuid5(uuid.NAMESPACE_URL, "nom019:" + "|".join(str(x) for x in r)).hex
+        c.execute("UPDATE hallazgos SET uuid = ?, version = 1, modificado_por = 'inicial', modificado_en = fecha_registro WHERE id = ?",
+                  (uid, r[0]))
+    if pendientes:
+        c.execute(f'''
+            INSERT INTO hallazgos_ops (uuid, op, version, version_base, nodo, fecha, datos)
+            SELECT uuid, 'I', version, 0, modificado_por, modificado_en, {_json_row("h")}
+            FROM hallazgos h WHERE id IN ({",".join(str(r[0]) for r in pendientes)})
+        ''')
+
+    changed = " OR ".join(f"NEW.{col} IS NOT OLD.{col}" for col in DATA_COLS)
+    # Cambio local (la app no toca version): se incrementa la versión
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS hallazgos_version AFTER UPDATE ON hallazgos
+        WHEN NEW.version IS OLD.version AND NEW.modificado_en IS OLD.modificado_en AND ({changed})
+        BEGIN
+            UPDATE hallazgos SET version = COALESCE(OLD.version, 0) + 1,
+                modificado_por = {NODE_SQL}, modificado_en = {NOW_SQL}
+            WHERE id = NEW.id;
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS hallazgos_ops_update AFTER UPDATE ON hallazgos
+        WHEN NEW.uuid IS NOT NULL AND (NEW.version IS NOT OLD.version OR NEW.modificado_en IS NOT OLD.modificado_en)
+        BEGIN
+            INSERT INTO hallazgos_ops (uuid, op, version, version_base, nodo, fecha, datos, base_nodo, base_fecha)
+            VALUES (NEW.uuid, 'U', NEW.version, OLD.version, NEW.modificado_por, NEW.modificado_en, {_json_row("NEW")},
+                    OLD.modificado_por, OLD.modificado_en);
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS hallazgos_ops_insert AFTER INSERT ON hallazgos
+        WHEN NEW.uuid IS NOT NULL
+        BEGIN
+            INSERT INTO hallazgos_ops (uuid, op, version, version_base, nodo, fecha, datos)
+            VALUES (NEW.uuid, 'I', NEW.version, 0, NEW.modificado_por, NEW.modificado_en, {_json_row("NEW")});
+        END
+    ''')
+    # 'pausa' la usan el archivado (no es una baja) y sync al aplicar bajas remotas
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS hallazgos_ops_delete AFTER DELETE ON hallazgos
+        WHEN OLD.uuid IS NOT NULL AND NOT EXISTS (SELECT 1 FROM sync_estado WHERE clave = 'pausa')
+        BEGIN
+            INSERT INTO hallazgos_ops (uuid, op, version, version_base, nodo, fecha, datos, base_nodo, base_fecha)
+            VALUES (OLD.uuid, 'D', COALESCE(OLD.version, 0) + 1, OLD.version, {NODE_SQL}, {NOW_SQL}, NULL,
+                    OLD.modificado_por, OLD.modificado_en);
+        END
+    ''')
+
+def _json_row(alias):
+    return "json_object(" + ", ".join(f"'{col}', {alias}.{col}" for col in DATA_COLS) + ")"
+
+DUP_QUERY = "SELECT id FROM {schema}.hallazgos WHERE hallazgo=? AND fecha_hallazgo=? AND cedis=?"
+INSERT_QUERY = f'''
+    INSERT INTO hallazgos (
+        numero_sesion, fecha_hallazgo, cedis, estado_geo, hallazgo, tipo_hallazgo,
+        riesgo, acciones_inmediatas, fecha_compromiso, responsable, estatus, 
+        evidencia_path, fecha_registro, uuid, version, modificado_por, modificado_en
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, {NODE_SQL}, {NOW_SQL})
+'''
+
+def _dup_schemas():
+    # El archivo solo se revisa si ya existe (insertar no debe crearlo)
+    return ("main", "archivo") if os.path.exists(_archive_path()) else ("main",)
+
+def _find_duplicate(c, data, schemas=("main",)):
+    """Busca el hallazgo (hallazgo + fecha + CEDIS) en la tabla activa y, si está adjunto, en el archivo."""
+    key = (data.get('hallazgo'), data.get('fecha_hallazgo'), data.get('cedis'))
+    for schema in schemas:
+        row = c.execute(DUP_QUERY.format(schema=schema), key).fetchone()
+        if row: return schema, row[0]
+    return None
+
+def _finding_values(data):
+    return (
+        data.get('numero_sesion'),
+        data.get('fecha_hallazgo'),
+        data.get('cedis'),
+        data.get('estado_geo', ''),
+        data.get('hallazgo'),
+        data.get('tipo_hallazgo'),
+        data.get('riesgo', 'Bajo'),
+        data.get('acciones_inmediatas'),
+        data.get('fecha_compromiso'),
+        data.get('responsable'),
+        data.get('estatus', 'Abierto'),
+        data.get('evidencia_path', None),
+        datetime.now(),
+        uuid.uuid4().hex
+    )
+
 def add_finding(data):
-    conn = sqlite3.connect(DB_NAME)
+    schemas = _dup_schemas()
+    conn, _ = _connect(include_archive=len(schemas) > 1)
     c = conn.cursor()
     try:
         # Check duplicates based on Description + Date + CEDIS to avoid re-insertion
-        c.execute("SELECT id FROM hallazgos WHERE hallazgo=? AND fecha_hallazgo=? AND cedis=?", 
-                  (data.get('hallazgo'), data.get('fecha_hallazgo'), data.get('cedis')))
-        if c.fetchone():
+        # (also against archived findings)
+        if _find_duplicate(c, data, schemas):
             return False # Skip duplicate
 
-        c.execute('''
-            INSERT INTO hallazgos (
-                numero_sesion, fecha_hallazgo, cedis, estado_geo, hallazgo, tipo_hallazgo,
-                riesgo, acciones_inmediatas, fecha_compromiso, responsable, estatus, 
-                evidencia_path, fecha_registro
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('numero_sesion'),
-            data.get('fecha_hallazgo'),
-            data.get('cedis'),
-            data.get('estado_geo', ''),
-            data.get('hallazgo'),
-            data.get('tipo_hallazgo'),
-            data.get('riesgo', 'Bajo'),
-            data.get('acciones_inmediatas'),
-            data.get('fecha_compromiso'),
-            data.get('responsable'),
-            data.get('estatus', 'Abierto'),
-            data.get('evidencia_path', None),
-            datetime.now()
-        ))
+        c.execute(INSERT_QUERY, _finding_values(data))
         conn.commit()
         return True
     except Exception as e:
@@ -74,13 +255,63 @@ def add_finding(data):
     finally:
         conn.close()
 
-def get_findings(filters=None):
+def add_findings(records):
+    """
+    Versión en lote de add_finding: una sola conexión y una sola transacción.
+    Aplica la misma regla de duplicados. Regresa el número de registros insertados.
+    """
+    schemas = _dup_schemas()
+    conn, _ = _connect(include_archive=len(schemas) > 1)
+    c = conn.cursor()
+    count = 0
+    try:
+        for data in records:
+            try:
+                if _find_duplicate(c, data, schemas): continue
+                c.execute(INSERT_QUERY, _finding_values(data))
+                count += 1
+            except Exception as e:
+                print(f"Error DB Add: {e}") # Se omite la fila, no el lote
+        conn.commit()
+        return count
+    finally:
+        conn.close()
+
+def get_manifest():
+    """Regresa {path: (size, mtime, sha256)} de los archivos ya procesados."""
     conn = sqlite3.connect(DB_NAME)
-    query = "SELECT * FROM hallazgos"
+    rows = conn.execute("SELECT path, size, mtime, sha256 FROM ingest_manifest").fetchall()
+    conn.close()
+    return {r[0]: (r[1], r[2], r[3]) for r in rows}
+
+def get_manifest_hashes():
+    conn = sqlite3.connect(DB_NAME)
+    rows = conn.execute("SELECT DISTINCT sha256 FROM ingest_manifest WHERE error IS NULL").fetchall()
+    conn.close()
+    return {r[0] for r in rows}
+
+def record_manifest(entries):
+    """entries: lista de dicts con path, size, mtime, sha256, registros y error."""
+    conn = sqlite3.connect(DB_NAME)
+    conn.executemany('''
+        INSERT OR REPLACE INTO ingest_manifest (path, size, mtime, sha256, registros, error, fecha_proceso)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(e['path'], e['size'], e['mtime'], e['sha256'], e.get('registros', 0), e.get('error'), datetime.now()) for e in entries])
+    conn.commit()
+    conn.close()
+
+def refresh_manifest(entries):
+    """Actualiza size/mtime de archivos tocados cuyo contenido (sha256) no cambió."""
+    conn = sqlite3.connect(DB_NAME)
+    conn.executemany("UPDATE ingest_manifest SET size = ?, mtime = ? WHERE path = ?",
+                     [(e['size'], e['mtime'], e['path']) for e in entries])
+    conn.commit()
+    conn.close()
+
+def _build_where(filters):
+    conditions = []
     params = []
-    
     if filters:
-        conditions = []
         for key, value in filters.items():
             if value:
                 if isinstance(value, list):
@@ -90,21 +321,150 @@ def get_findings(filters=None):
                 else:
                     conditions.append(f"{key} = ?")
                     params.append(value)
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return where, params
+
+def _archive_path():
+    return ARCHIVE_DB_NAME or os.path.splitext(DB_NAME)[0] + "_archivo.db"
+
+def _connect(include_archive=False):
+    """
+    Conexión a la base principal. Con include_archive se adjunta el archivo
+    (ATTACH DATABASE) y se crea la vista temporal hallazgos_todos (UNION ALL).
+    Regresa (conn, tabla a consultar).
+    """
+    conn = sqlite3.connect(DB_NAME)
+    if not include_archive:
+        return conn, "hallazgos"
+    conn.execute("ATTACH DATABASE ? AS archivo", (_archive_path(),))
+    conn.execute(f"CREATE TABLE IF NOT EXISTS archivo.hallazgos ({HALLAZGOS_SCHEMA})")
+    _add_sync_columns(conn, "archivo")
+    conn.execute("CREATE INDEX IF NOT EXISTS archivo.idx_hallazgos_dup ON hallazgos (hallazgo, fecha_hallazgo, cedis)")
+    cols = ", ".join(r[1] for r in conn.execute("PRAGMA main.table_info(hallazgos)"))
+    conn.execute(f'''
+        CREATE TEMP VIEW hallazgos_todos AS
+        SELECT {cols} FROM main.hallazgos
+        UNION ALL
+        SELECT {cols} FROM archivo.hallazgos
+    ''')
+    return conn, "hallazgos_todos"
+
+def get_findings(filters=None, include_archive=False):
+    conn, table = _connect(include_archive)
+    where, params = _build_where(filters)
+    query = f"SELECT * FROM {table}" + where
     
     df = pd.read_sql_query(query, conn, params=params)
     conn.close()
     return df
 
+def iter_findings(filters=None, batch_size=EXPORT_BATCH_SIZE, include_archive=False):
+    """
+    Recorre hallazgos en bloques de `batch_size` filas (DataFrames),
+    sin cargar la tabla completa en memoria.
+    """
+    conn, table = _connect(include_archive)
+    where, params = _build_where(filters)
+    query = f"SELECT * FROM {table}" + where + " ORDER BY id"
+    try:
+        for chunk in pd.read_sql_query(query, conn, params=params, chunksize=batch_size):
+            yield chunk
+    finally:
+        conn.close()
+
+def _arrow_schema(columns):
+    fields = []
+    for col in columns:
+        if col in ("id", "version"):
+            fields.append(pa.field(col, pa.int64()))
+        elif col in CATEGORICAL_COLS:
+            fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+def _to_record_batch(chunk, schema):
+    arrays = []
+    for field in schema:
+        values = chunk[field.name]
+        if pa.types.is_integer(field.type):
+            arrays.append(pa.array([None if pd.isna(v) else int(v) for v in values], type=pa.int64()))
+            continue
+        # SQLite guarda fechas/timestamps como texto; se exportan tal cual
+        values = [None if pd.isna(v) else str(v) for v in values]
+        arr = pa.array(values, type=pa.string())
+        if pa.types.is_dictionary(field.type):
+            arr = arr.dictionary_encode()
+        arrays.append(arr)
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def _table_columns(table="hallazgos"):
+    conn = sqlite3.connect(DB_NAME)
+    cols = [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+    conn.close()
+    return cols
+
+def _open_writer(dest, fmt, schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(dest, schema, use_dictionary=CATEGORICAL_COLS, compression="snappy")
+    # Formato stream: admite un diccionario distinto por bloque
+    return pa.ipc.new_stream(dest, schema)
+
+def export_findings(dest, fmt="parquet", filters=None, batch_size=EXPORT_BATCH_SIZE, include_archive=False):
+    """
+    Exporta hallazgos (o el subconjunto de `filters`) a `dest` (ruta o buffer binario).
+    Formatos: parquet, arrow (Arrow IPC stream) y csv. Se escribe bloque por bloque,
+    así que la memoria no crece con el tamaño de la tabla. Con include_archive se
+    incluyen los hallazgos archivados. Regresa el número de filas.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    if fmt in ("parquet", "arrow") and not HAS_ARROW:
+        raise RuntimeError("Se requiere pyarrow para exportar a Parquet/Arrow")
+
+    total = 0
+    if fmt == "csv":
+        header = True
+        for chunk in iter_findings(filters, batch_size, include_archive):
+            if isinstance(dest, str):
+                chunk.to_csv(dest, mode="w" if header else "a", header=header, index=False)
+            else:
+                dest.write(chunk.to_csv(header=header, index=False).encode("utf-8"))
+            header = False
+            total += len(chunk)
+        if header: # Sin filas: solo encabezados
+            line = ",".join(_table_columns()) + "\n"
+            if isinstance(dest, str):
+                with open(dest, "w", encoding="utf-8") as f: f.write(line)
+            else:
+                dest.write(line.encode("utf-8"))
+        return total
+
+    schema = None
+    writer = None
+    try:
+        for chunk in iter_findings(filters, batch_size, include_archive):
+            if writer is None:
+                schema = _arrow_schema(chunk.columns)
+                writer = _open_writer(dest, fmt, schema)
+            writer.write_batch(_to_record_batch(chunk, schema))
+            total += len(chunk)
+        if writer is None: # Sin filas: archivo válido con el esquema
+            writer = _open_writer(dest, fmt, _arrow_schema(_table_columns()))
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
 def update_finding(id_hallazgo, data):
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
     try:
-        # Dynamic update
+        # Dynamic update (uuid/version/modificado_* los mantienen los triggers)
         fields = []
         values = []
         for key, value in data.items():
+            if key in SYNC_COLS: continue
             fields.append(f"{key} = ?")
             values.append(value)
         
@@ -125,3 +485,49 @@ def delete_finding(id_hallazgo):
     c.execute("DELETE FROM hallazgos WHERE id = ?", (id_hallazgo,))
     conn.commit()
     conn.close()
+
+def archive_stats():
+    """Regresa (filas en la tabla activa, filas archivadas)."""
+    conn, _ = _connect(include_archive=True)
+    hot = conn.execute("SELECT COUNT(*) FROM main.hallazgos").fetchone()[0]
+    cold = conn.execute("SELECT COUNT(*) FROM archivo.hallazgos").fetchone()[0]
+    conn.close()
+    return hot, cold
+
+def archive_closed(age_days=ARCHIVE_AGE_DAYS, batch_size=ARCHIVE_BATCH_SIZE, log=print):
+    """
+    Mueve al archivo los hallazgos con estatus 'Cerrado' detectados hace más de
+    `age_days` días (ver ARCHIVE_DATE_SQL). Cada lote (copiar + borrar) es una transacción: si el proceso
+    se interrumpe, volver a correrlo continúa donde se quedó. Regresa filas movidas.
+    """
+    cutoff = (datetime.now() - timedelta(days=age_days)).strftime("%Y-%m-%d")
+    conn, _ = _connect(include_archive=True)
+    conn.isolation_level = None # Transacciones explícitas
+    cols = ", ".join(r[1] for r in conn.execute("PRAGMA main.table_info(hallazgos)"))
+    moved = 0
+    try:
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            ids = [r[0] for r in conn.execute(f'''
+                SELECT id FROM main.hallazgos
+                WHERE estatus = 'Cerrado' AND {ARCHIVE_DATE_SQL} < ?
+                ORDER BY id LIMIT ?
+            ''', (cutoff, batch_size))]
+            if not ids:
+                conn.execute("COMMIT")
+                break
+            placeholders = ','.join(['?'] * len(ids))
+            conn.execute(f"INSERT OR REPLACE INTO archivo.hallazgos ({cols}) SELECT {cols} FROM main.hallazgos WHERE id IN ({placeholders})", ids)
+            # Archivar no es una baja: no se registra en la bitácora de sincronización
+            conn.execute("INSERT OR REPLACE INTO sync_estado VALUES ('pausa', '1')")
+            conn.execute(f"DELETE FROM main.hallazgos WHERE id IN ({placeholders})", ids)
+            conn.execute("DELETE FROM sync_estado WHERE clave = 'pausa'")
+            conn.execute("COMMIT")
+            moved += len(ids)
+            log(f"Archivados {moved} hallazgos...")
+    except Exception:
+        if conn.in_transaction: conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return moved
@@ -3,12 +3,31 @@ from docx import Document
 import re
 from datetime import datetime
 import pdfplumber
+import time
+import numpy as np
 try:
     import easyocr
-    import numpy as np
     HAS_OCR = True
 except ImportError:
     HAS_OCR = False
+try:
+    import cv2
+    HAS_CV = True
+except ImportError:
+    HAS_CV = False
+
+# Preprocesamiento OpenCV antes del OCR (ver preprocess_page)
+OCR_CONFIG = {
+    "dpi": 300,
+    "preprocess": True,        # False = página completa sin tocar (comportamiento original)
+    "deskew": True,
+    "binarize": True,
+    "block_size": 31,          # Ventana de la binarización adaptativa (impar)
+    "c": 15,
+    "crop_table": True,        # Recortar al rectángulo de la tabla de hallazgos
+    "solo_columna_hallazgo": True,  # Reconocer solo la columna de hallazgos
+}
+HEADER_OCR_KEYWORDS = ["HALLAZGO", "OBSERVACION"]
 
 EXCEL_COL_MAP = {
     "Sesión": "numero_sesion",
@@ -35,7 +54,7 @@ def parse_excel_matrix(file):
     except Exception as e:
         return None, str(e)
 
-def parse_pdf_acta(file):
+def parse_pdf_acta(file, ocr_config=None):
     """
     Intenta 3 estrategias:
     1. Parseo Nativo de Tablas (pdfplumber)
@@ -94,41 +113,7 @@ def parse_pdf_acta(file):
     if HAS_OCR:
         print("Iniciando OCR...")
         try:
-            reader = easyocr.Reader(['es'], gpu=False) 
-            
-            with pdfplumber.open(file) as pdf:
-                for page in pdf.pages:
-                    im = page.to_image(resolution=300).original
-                    im_np = np.array(im)
-                    result = reader.readtext(im_np) # [(bbox, text, conf), ...]
-                    
-                    header_y = -1
-                    cols_x = {"hallazgo": 0}
-                    
-                    # Detectar Header
-                    for (bbox, text, prob) in result:
-                        text_up = text.upper()
-                        if "HALLAZGO" in text_up or "OBSERVACION" in text_up:
-                            header_y = bbox[0][1]
-                            cols_x["hallazgo"] = bbox[0][0]
-                            break 
-                    
-                    if header_y > 0:
-                        # Filtrar contenido
-                        content_items = [x for x in result if x[0][0][1] > header_y + 20]
-                        content_items.sort(key=lambda x: x[0][0][1])
-                        
-                        for (bbox, text, prob) in content_items:
-                            # Alinear mas o menos con la columna Hallazgo detected
-                            if abs(bbox[0][0] - cols_x["hallazgo"]) < 200: 
-                                # Heurística muy laxa: cualquier texto en esa zona X
-                                findings.append({
-                                    "hallazgo": text,
-                                    "acciones_inmediatas": "",
-                                    "responsable": "",
-                                    "estatus": "Abierto (OCR)",
-                                    "tipo_hallazgo": "Documental"
-                                })
+            findings = ocr_pdf(file, ocr_config)
         except Exception as e:
              print(f"Error OCR: {e}")
 
@@ -159,3 +144,192 @@ def parse_pdf_acta(file):
         pass
 
     return findings
+
+
+# --- OCR ---
+_READER = None
+
+def _get_reader():
+    # Cargar el modelo de easyocr es caro: una sola vez por proceso
+    global _READER
+    if not HAS_OCR:
+        raise RuntimeError("Se requiere easyocr para el OCR de actas escaneadas")
+    if _READER is None:
+        _READER = easyocr.Reader(['es'], gpu=False)
+    return _READER
+
+def _deskew(gray):
+    """Endereza la página usando el ángulo mediano de las líneas casi horizontales."""
+    edges = cv2.Canny(gray, 50, 150)
+    lines = cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=200,
+                            minLineLength=gray.shape[1] // 4, maxLineGap=10)
+    if lines is None: return gray
+    angles = []
+    for x1, y1, x2, y2 in lines.reshape(-1, 4):
+        angle = np.degrees(np.arctan2(y2 - y1, x2 - x1))
+        if abs(angle) < 15: angles.append(angle)
+    if not angles: return gray
+    angle = float(np.median(angles))
+    if abs(angle) < 0.1: return gray
+    h, w = gray.shape
+    M = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(gray, M, (w, h), flags=cv2.INTER_CUBIC, borderValue=255)
+
+def _line_positions(mask, axis, min_fill):
+    """Posiciones (centro) de las líneas de `mask` a lo largo de `axis` (0 = filas, 1 = columnas)."""
+    profile = (mask > 0).sum(axis=1 - axis)
+    idx = np.where(profile >= min_fill)[0]
+    positions = []
+    start = prev = None
+    for i in idx:
+        if start is None:
+            start = prev = i
+        elif i - prev > 3:
+            positions.append(int(start + prev) // 2)
+            start = i
+        prev = i
+    if start is not None: positions.append(int(start + prev) // 2)
+    return positions
+
+def find_table(binary):
+    """
+    Localiza la tabla de hallazgos en una imagen binaria (tinta negra).
+    Regresa ((x, y, w, h), filas_y, columnas_x) relativos al recorte, o None.
+    """
+    inv = cv2.bitwise_not(binary)
+    H, W = inv.shape
+    horiz = cv2.morphologyEx(inv, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (max(W // 30, 1), 1)))
+    vert = cv2.morphologyEx(inv, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(H // 40, 1))))
+    grid = cv2.dilate(cv2.bitwise_or(horiz, vert), np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(grid, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours: return None
+    x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    if w < W * 0.4 or h < H * 0.05: return None # Ruido, no una tabla
+    rows = _line_positions(horiz[y:y + h, x:x + w], 0, w * 0.5)
+    cols = _line_positions(vert[y:y + h, x:x + w], 1, h * 0.5)
+    return (x, y, w, h), rows, cols
+
+def preprocess_page(im_np, config=None):
+    """
+    Escala de grises, enderezado, binarización adaptativa y recorte a la tabla.
+    Regresa (imagen, filas_y, columnas_x); filas/columnas vacías si no hubo tabla.
+    """
+    config = {**OCR_CONFIG, **(config or {})}
+    gray = cv2.cvtColor(im_np, cv2.COLOR_RGB2GRAY) if im_np.ndim == 3 else im_np
+    if config["deskew"]:
+        gray = _deskew(gray)
+    img = gray
+    if config["binarize"]:
+        img = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                    config["block_size"], config["c"])
+    if config["crop_table"]:
+        binary = img if config["binarize"] else cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
+        table = find_table(binary)
+        if table:
+            (x, y, w, h), rows, cols = table
+            return img[y:y + h, x:x + w], rows, cols
+    return img, [], []
+
+def _column_span(reader, img, rows, cols):
+    """Lee solo la fila de encabezado y regresa (x0, x1, y0) de la columna de hallazgos."""
+    if len(rows) < 2 or len(cols) < 2: return None
+    header = img[rows[0]:rows[1], :]
+    for (bbox, text, prob) in reader.readtext(header):
+        if any(k in text.upper() for k in HEADER_OCR_KEYWORDS):
+            cx = (bbox[0][0] + bbox[1][0]) / 2
+            for x0, x1 in zip(cols, cols[1:]):
+                if x0 <= cx <= x1: return x0, x1, rows[1]
+    return None
+
+def _ocr_legacy(result):
+    """Heurística original: textos alineados bajo el encabezado 'Hallazgo'."""
+    texts = []
+    header_y = -1
+    cols_x = {"hallazgo": 0}
+    for (bbox, text, prob) in result:
+        text_up = text.upper()
+        if any(k in text_up for k in HEADER_OCR_KEYWORDS):
+            header_y = bbox[0][1]
+            cols_x["hallazgo"] = bbox[0][0]
+            break
+    if header_y > 0:
+        content_items = [x for x in result if x[0][0][1] > header_y + 20]
+        content_items.sort(key=lambda x: x[0][0][1])
+        for (bbox, text, prob) in content_items:
+            # Heurística muy laxa: cualquier texto en esa zona X
+            if abs(bbox[0][0] - cols_x["hallazgo"]) < 200:
+                texts.append(text)
+    return texts
+
+def ocr_page(reader, im_np, config=None):
+    """
+    OCR de una página. Regresa (textos de hallazgos, tiempos en segundos por etapa).
+    """
+    config = {**OCR_CONFIG, **(config or {})}
+    timings = {}
+    t0 = time.perf_counter()
+    if not (config["preprocess"] and HAS_CV):
+        texts = _ocr_legacy(reader.readtext(im_np))
+        timings["ocr"] = time.perf_counter() - t0
+        return texts, timings
+
+    img, rows, cols = preprocess_page(im_np, config)
+    timings["preproceso"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    span = _column_span(reader, img, rows, cols) if config["solo_columna_hallazgo"] else None
+    if span is None:
+        texts = _ocr_legacy(reader.readtext(img))
+    else:
+        # Solo la columna de hallazgos; se agrupa por fila de la tabla
+        x0, x1, y0 = span
+        by_row = {}
+        for (bbox, text, prob) in reader.readtext(img[y0:, x0:x1]):
+            cy = y0 + (bbox[0][1] + bbox[2][1]) / 2
+            row = sum(1 for r in rows if r < cy)
+            by_row.setdefault(row, []).append(text)
+        texts = [" ".join(v) for _, v in sorted(by_row.items())]
+    timings["ocr"] = time.perf_counter() - t0
+    return texts, timings
+
+def ocr_pdf(file, config=None, stats=None):
+    """
+    OCR de todas las páginas. Si se pasa `stats` (lista), se agrega un dict por página
+    con los tiempos de cada etapa.
+    """
+    config = {**OCR_CONFIG, **(config or {})}
+    reader = _get_reader()
+    findings = []
+    with pdfplumber.open(file) as pdf:
+        for n, page in enumerate(pdf.pages, 1):
+            t0 = time.perf_counter()
+            im_np = np.array(page.to_image(resolution=config["dpi"]).original)
+            render = time.perf_counter() - t0
+            texts, timings = ocr_page(reader, im_np, config)
+            timings = {"pagina": n, "render": render, **timings}
+            timings["total"] = sum(v for k, v in timings.items() if k != "pagina")
+            print("  OCR página {pagina}: {total:.2f}s".format(**timings))
+            if stats is not None: stats.append(timings)
+            for text in texts:
+                findings.append({
+                    "hallazgo": text,
+                    "acciones_inmediatas": "",
+                    "responsable": "",
+                    "estatus": "Abierto (OCR)",
+                    "tipo_hallazgo": "Documental"
+                })
+    return findings
+
+def benchmark_ocr(file, config=None):
+    """
+    Compara por página el OCR original (página completa) contra el preprocesado.
+    Regresa un DataFrame con los tiempos de ambos.
+    """
+    raw, pre = [], []
+    # Misma configuración (dpi incluido), solo sin preprocesar
+    ocr_pdf(file, {**(config or {}), "preprocess": False}, stats=raw)
+    if hasattr(file, "seek"): file.seek(0)
+    ocr_pdf(file, config, stats=pre)
+    df = pd.DataFrame(pre).merge(pd.DataFrame(raw)[["pagina", "total"]], on="pagina", suffixes=("", "_original"))
+    df["aceleracion"] = df["total_original"] / df["total"]
+    return df
@@ -0,0 +1,137 @@
+"""
+Ingesta en lote de actas (PDF) y matrices (Excel) desde una carpeta.
+
+Cada archivo procesado queda en la tabla ingest_manifest con (path, size, mtime, sha256).
+En corridas posteriores solo se hace stat() de cada archivo; el hash y el parseo
+únicamente se pagan por archivos nuevos o modificados.
+"""
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import database
+import file_parser
+
+SUPPORTED_EXT = {".xlsx", ".pdf"}
+HASH_BLOCK = 1024 * 1024
+FILES_PER_COMMIT = 50
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def scan_dir(root):
+    """Regresa [(path, size, mtime)] de los archivos soportados bajo `root`."""
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() not in SUPPORTED_EXT: continue
+            if name.startswith("~$"): continue # Temporales de Excel
+            path = os.path.abspath(os.path.join(dirpath, name))
+            st = os.stat(path)
+            found.append((path, st.st_size, st.st_mtime))
+    found.sort()
+    return found
+
+def parse_file(path):
+    """
+    Corre en un proceso hijo. Regresa (path, registros, error) con registros como
+    lista de dicts listos para database.add_findings.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext == ".xlsx":
+            df = file_parser.parse_excel_matrix(path)
+            if not isinstance(df, pd.DataFrame):
+                return path, [], df[1] if isinstance(df, tuple) else "Excel no válido"
+            # NaN/NaT no son valores válidos para sqlite3
+            df = df.astype(object).where(pd.notna(df), None)
+            return path, df.to_dict("records"), None
+        findings = file_parser.parse_pdf_acta(path)
+        if not findings:
+            return path, [], "No se pudieron extraer datos"
+        return path, findings, None
+    except Exception as e:
+        return path, [], str(e)
+
+def pending_files(root):
+    """
+    Compara la carpeta contra el manifiesto. Regresa (nuevos, repetidos, tocados, copias):
+    nuevos -> [(path, size, mtime, sha256)] por parsear;
+    repetidos -> entradas para archivos cuyo contenido ya se procesó con éxito en una
+    corrida anterior (copias o renombrados) y que solo hay que registrar;
+    tocados -> entradas de archivos con mtime/size nuevo pero el mismo sha256 que ya
+    tenían en el manifiesto (solo se refresca size/mtime);
+    copias -> {sha256: [entradas]} de copias de un archivo nuevo de esta corrida; se
+    registran solo si el original se procesa sin error.
+    """
+    manifest = database.get_manifest()
+    known_hashes = None
+    nuevos, repetidos, tocados = [], [], []
+    copias = {}
+    for path, size, mtime in scan_dir(root):
+        prev = manifest.get(path)
+        if prev and prev[0] == size and prev[1] == mtime:
+            continue
+        if known_hashes is None:
+            known_hashes = database.get_manifest_hashes()
+        sha = file_sha256(path)
+        entry = {"path": path, "size": size, "mtime": mtime, "sha256": sha, "registros": 0}
+        if prev and prev[2] == sha:
+            tocados.append(entry)
+        elif sha in known_hashes:
+            repetidos.append(entry)
+        elif sha in copias:
+            copias[sha].append(entry)
+        else:
+            nuevos.append((path, size, mtime, sha))
+            copias[sha] = []
+    return nuevos, repetidos, tocados, {sha: e for sha, e in copias.items() if e}
+
+def ingest_dir(root, workers=None, log=print):
+    """Procesa los archivos nuevos de `root`. Regresa (archivos, registros insertados)."""
+    nuevos, repetidos, tocados, copias = pending_files(root)
+    if tocados:
+        database.refresh_manifest(tocados)
+    if repetidos:
+        database.record_manifest(repetidos)
+    if not nuevos:
+        log(f"Sin archivos nuevos en {root}")
+        return 0, 0
+
+    log(f"{len(nuevos)} archivos nuevos en {root}")
+    info = {path: (size, mtime, sha) for path, size, mtime, sha in nuevos}
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(nuevos), FILES_PER_COMMIT):
+            chunk = [n[0] for n in nuevos[start:start + FILES_PER_COMMIT]]
+            records, entries = [], []
+            for path, regs, error in pool.map(parse_file, chunk):
+                size, mtime, sha = info[path]
+                if error: log(f"  ✗ {path}: {error}")
+                records.extend(regs)
+                entries.append({"path": path, "size": size, "mtime": mtime, "sha256": sha,
+                                "registros": len(regs), "error": error})
+                # Las copias quedan pendientes si el original falló
+                if not error: entries.extend(copias.get(sha, []))
+            # Primero los hallazgos, luego el manifiesto: si algo falla entre ambos,
+            # la siguiente corrida reprocesa y la regla de duplicados evita repetir filas.
+            inserted = database.add_findings(records)
+            database.record_manifest(entries)
+            total += inserted
+            log(f"  {start + len(chunk)}/{len(nuevos)} archivos, {inserted} registros nuevos")
+    return len(nuevos), total
+
+def watch_dir(root, interval=60, workers=None, log=print):
+    """Revisa `root` cada `interval` segundos hasta Ctrl+C."""
+    log(f"Vigilando {root} cada {interval}s (Ctrl+C para salir)")
+    try:
+        while True:
+            ingest_dir(root, workers=workers, log=log)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        log("Vigilancia detenida")
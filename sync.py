@@ -0,0 +1,298 @@
+"""
+Sincronización por deltas entre copias de nom019.db (laptops de auditores y base central).
+
+Cada base registra sus cambios en hallazgos_ops (triggers en database.init_db).
+Un delta es un archivo JSON-lines comprimido con gzip. Contiene las operaciones
+posteriores a lo que el otro nodo ya confirmó, y también la confirmación de lo
+que este nodo ya recibió de él. Si un archivo se pierde, el siguiente delta
+vuelve a incluir esas operaciones.
+
+Flujo típico (laptop <-> central):
+    laptop:  python -m actas sync export delta_laptop.jsonl.gz --para <nodo central>
+    central: python -m actas sync apply delta_laptop.jsonl.gz
+    central: python -m actas sync export delta_central.jsonl.gz --para <nodo laptop>
+    laptop:  python -m actas sync apply delta_central.jsonl.gz
+
+Al copiar nom019.db a una laptop nueva, correr `python -m actas sync nodo --nuevo`
+en la copia para que tenga identidad propia.
+"""
+import gzip
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+import pandas as pd
+import database
+
+ESTRATEGIAS = ["lww", "marcar"]
+DELTA_VERSION = 2
+
+def _get(conn, clave, default=None):
+    row = conn.execute("SELECT valor FROM sync_estado WHERE clave = ?", (clave,)).fetchone()
+    return row[0] if row else default
+
+def _set(conn, clave, valor):
+    conn.execute("INSERT OR REPLACE INTO sync_estado VALUES (?, ?)", (clave, str(valor)))
+
+def node_id(nuevo=False):
+    """Identificador de esta base. Con nuevo=True se regenera y se olvidan las marcas de agua."""
+    database.init_db()
+    conn = sqlite3.connect(database.DB_NAME)
+    if nuevo:
+        conn.execute("DELETE FROM sync_estado WHERE clave LIKE 'recibido:%' OR clave LIKE 'confirmado:%'")
+        _set(conn, "nodo", uuid.uuid4().hex)
+        # Lo capturado antes de regenerar quedó con el identificador de la base original
+        _set(conn, "regenerado", conn.execute("SELECT COALESCE(MAX(seq), 0) FROM hallazgos_ops").fetchone()[0])
+        conn.commit()
+    nodo = _get(conn, "nodo")
+    conn.close()
+    return nodo
+
+def export_delta(path, para):
+    """
+    Escribe en `path` (ruta o buffer binario) las operaciones que el nodo `para` aún no confirmó
+    (sin las que se originaron en él). Regresa el número de operaciones.
+    """
+    database.init_db()
+    conn = sqlite3.connect(database.DB_NAME)
+    try:
+        nodo_propio = _get(conn, "nodo")
+        if para == nodo_propio:
+            raise ValueError(f"El destino {para} es esta misma base; si es una copia, regenere su identificador "
+                             "(python -m actas sync nodo --nuevo)")
+        desde = int(_get(conn, f"confirmado:{para}", 0))
+        hasta = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM hallazgos_ops").fetchone()[0]
+        header = {
+            "formato": DELTA_VERSION,
+            "nodo": nodo_propio,
+            "para": para,
+            "desde": desde,
+            "hasta": hasta,
+            # Confirmación: hasta dónde ya aplicamos la bitácora de `para`
+            "ack": int(_get(conn, f"recibido:{para}", 0)),
+        }
+        # Las ops anteriores a un `nodo --nuevo` se envían aunque parezcan de `para`:
+        # pueden ser propias, y el destino descarta las que ya tiene.
+        regenerado = int(_get(conn, "regenerado", 0))
+        cur = conn.execute(
+            "SELECT seq, uuid, op, version, version_base, nodo, fecha, datos, base_nodo, base_fecha FROM hallazgos_ops "
+            "WHERE seq > ? AND seq <= ? AND (nodo IS NOT ? OR seq <= ?) ORDER BY seq", (desde, hasta, para, regenerado))
+        total = 0
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            for seq, uid, op, version, base, nodo, fecha, datos, base_nodo, base_fecha in cur:
+                f.write(json.dumps({"seq": seq, "uuid": uid, "op": op, "version": version, "base": base,
+                                    "base_nodo": base_nodo, "base_fecha": base_fecha, "nodo": nodo, "fecha": fecha,
+                                    "datos": json.loads(datos) if datos else None},
+                                   ensure_ascii=False, separators=(",", ":")) + "\n")
+                total += 1
+        return total
+    finally:
+        conn.close()
+
+def read_delta(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        ops = [json.loads(line) for line in f if line.strip()]
+    return header, ops
+
+def _find_local(conn, uid):
+    """Regresa (esquema, fila) del hallazgo con ese uuid, buscando también en el archivo."""
+    cols = ["id", "version", "modificado_por", "modificado_en"] + database.DATA_COLS
+    for schema in ("main", "archivo"):
+        row = conn.execute(f"SELECT {', '.join(cols)} FROM {schema}.hallazgos WHERE uuid = ?", (uid,)).fetchone()
+        if row: return schema, dict(zip(cols, row))
+    return None, None
+
+def _upsert(conn, schema, local, op):
+    datos = op["datos"] or {}
+    values = [datos.get(col) for col in database.DATA_COLS] + [op["version"], op["nodo"], op["fecha"]]
+    meta = ["version", "modificado_por", "modificado_en"]
+    if schema == "main":
+        sets = ", ".join(f"{col} = ?" for col in database.DATA_COLS + meta)
+        conn.execute(f"UPDATE main.hallazgos SET {sets} WHERE id = ?", values + [local["id"]])
+        return
+    if schema == "archivo":
+        # Un cambio remoto sobre un hallazgo archivado lo regresa a la tabla activa
+        conn.execute("DELETE FROM archivo.hallazgos WHERE id = ?", (local["id"],))
+    cols = database.DATA_COLS + meta + ["uuid"]
+    conn.execute(f"INSERT INTO main.hallazgos ({', '.join(cols)}) VALUES ({', '.join(['?'] * len(cols))})",
+                 values + [op["uuid"]])
+
+def _delete(conn, schema, local, op):
+    if schema == "main":
+        _set(conn, "pausa", 1)
+        conn.execute("DELETE FROM main.hallazgos WHERE id = ?", (local["id"],))
+        conn.execute("DELETE FROM sync_estado WHERE clave = 'pausa'")
+    elif schema == "archivo":
+        conn.execute("DELETE FROM archivo.hallazgos WHERE id = ?", (local["id"],))
+    # La baja se registra con su nodo de origen para reenviarla a otros nodos
+    conn.execute("INSERT INTO hallazgos_ops (uuid, op, version, version_base, nodo, fecha, datos, base_nodo, base_fecha) "
+                 "VALUES (?, 'D', ?, ?, ?, ?, NULL, ?, ?)",
+                 (op["uuid"], op["version"], op["base"], op["nodo"], op["fecha"], op.get("base_nodo"), op.get("base_fecha")))
+
+def _conflict(conn, motivo, local, op):
+    conn.execute("INSERT INTO sync_conflictos (uuid, motivo, local, remoto, nodo, fecha) VALUES (?, ?, ?, ?, ?, ?)",
+                 (op["uuid"], motivo, json.dumps(local, default=str, ensure_ascii=False),
+                  json.dumps(op, ensure_ascii=False), op["nodo"], datetime.now()))
+
+def _pending_conflict(conn, op):
+    """
+    Si el uuid ya tiene un conflicto sin resolver, la op no se aplica: solo se guarda
+    como la versión remota más reciente del conflicto. Regresa True en ese caso.
+    """
+    cur = conn.execute("UPDATE sync_conflictos SET remoto = ?, nodo = ?, fecha = ? WHERE uuid = ? AND resuelto = 0",
+                       (json.dumps(op, ensure_ascii=False), op["nodo"], datetime.now(), op["uuid"]))
+    return cur.rowcount > 0
+
+def _known(conn, op):
+    """True si la op ya está en la bitácora local (se aplicó antes o llegó por otro nodo)."""
+    return conn.execute(
+        "SELECT 1 FROM hallazgos_ops WHERE uuid = ? AND op = ? AND version IS ? AND fecha IS ? AND nodo IS ? LIMIT 1",
+        (op["uuid"], op["op"], op["version"], op["fecha"], op["nodo"])).fetchone() is not None
+
+def _stamp(fecha, nodo):
+    # Orden de last-writer-wins entre ediciones concurrentes: fecha de modificación, luego nodo.
+    # La versión solo sirve para detectar la concurrencia, no para ordenarla.
+    return (str(fecha or ""), nodo or "")
+
+def _tombstone(conn, uid):
+    """Última baja registrada para ese uuid, con el mismo formato que una op, o None."""
+    row = conn.execute(
+        "SELECT version, version_base, nodo, fecha FROM hallazgos_ops WHERE uuid = ? AND op = 'D' "
+        "ORDER BY version DESC, seq DESC LIMIT 1", (uid,)).fetchone()
+    if row is None: return None
+    return {"uuid": uid, "op": "D", "version": row[0], "base": row[1], "nodo": row[2], "fecha": row[3]}
+
+def _apply_op(conn, op, estrategia):
+    """Regresa 'aplicada', 'omitida' o 'conflicto'."""
+    if _known(conn, op):
+        return "omitida" # Ya la tenemos
+    if _get(conn, f"alias:{op['uuid']}"):
+        return "omitida" # Duplicado ya señalado: aquí el hallazgo tiene otro uuid
+    if _pending_conflict(conn, op):
+        return "conflicto"
+    schema, local = _find_local(conn, op["uuid"])
+
+    if local is None:
+        tomb = _tombstone(conn, op["uuid"])
+        if tomb is not None:
+            if op["op"] != "D" and estrategia == "marcar":
+                # Baja local concurrente con una edición remota
+                _conflict(conn, "baja concurrente", tomb, op)
+                return "conflicto"
+            if _stamp(op["fecha"], op["nodo"]) <= _stamp(tomb["fecha"], tomb["nodo"]):
+                return "omitida"
+            # Si es una edición, gana y el hallazgo se restaura más abajo
+        if op["op"] == "D":
+            _delete(conn, None, None, op) # Solo la lápida
+            return "aplicada"
+        datos = op["datos"] or {}
+        dup = database._find_duplicate(conn, datos, ("main", "archivo"))
+        if dup:
+            # Mismo hallazgo capturado por separado en dos nodos. Se recuerda el par para
+            # que los cambios posteriores del uuid remoto no se vuelvan a marcar.
+            propio = conn.execute(f"SELECT uuid FROM {dup[0]}.hallazgos WHERE id = ?", (dup[1],)).fetchone()[0]
+            _set(conn, f"alias:{op['uuid']}", propio)
+            _conflict(conn, "duplicado", {"esquema": dup[0], "id": dup[1], "uuid": propio}, op)
+            return "conflicto"
+        _upsert(conn, None, None, op)
+        return "aplicada"
+
+    base = (op["base"], op.get("base_fecha"), op.get("base_nodo"))
+    if base == (local["version"], local["modificado_en"], local["modificado_por"]):
+        pass # Avance directo: nadie más tocó el registro
+    elif estrategia == "marcar":
+        # La op no parte de la versión local: ambos lados modificaron el registro
+        _conflict(conn, "baja concurrente" if op["op"] == "D" else "edicion concurrente", local, op)
+        return "conflicto"
+    elif _stamp(op["fecha"], op["nodo"]) <= _stamp(local["modificado_en"], local["modificado_por"]):
+        return "omitida"
+
+    if op["op"] == "D": _delete(conn, schema, local, op)
+    else: _upsert(conn, schema, local, op)
+    return "aplicada"
+
+def apply_delta(path, estrategia="lww"):
+    """
+    Aplica un delta en una sola transacción. estrategia: 'lww' (gana la edición más
+    reciente) o 'marcar' (las ediciones concurrentes quedan en sync_conflictos).
+    Regresa un dict con el conteo por resultado.
+    """
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia no soportada: {estrategia}")
+    header, ops = read_delta(path)
+    database.init_db()
+    conn, _ = database._connect(include_archive=True)
+    conn.isolation_level = None
+    resumen = {"aplicada": 0, "omitida": 0, "conflicto": 0}
+    try:
+        nodo = _get(conn, "nodo")
+        if header.get("para") not in (None, nodo):
+            raise ValueError(f"El delta es para el nodo {header['para']}, esta base es {nodo}")
+        if header["nodo"] == nodo:
+            # Pasa cuando una base se copió sin regenerar su identificador
+            raise ValueError(f"El delta viene de una base con el mismo identificador ({nodo}); "
+                             "regenere el de la copia (python -m actas sync nodo --nuevo)")
+        origen = header["nodo"]
+        conn.execute("BEGIN IMMEDIATE")
+        recibido = int(_get(conn, f"recibido:{origen}", 0))
+        for op in ops:
+            if op["seq"] <= recibido: continue # Delta repetido
+            resumen[_apply_op(conn, op, estrategia)] += 1
+        _set(conn, f"recibido:{origen}", max(recibido, header["hasta"]))
+        confirmado = int(_get(conn, f"confirmado:{origen}", 0))
+        _set(conn, f"confirmado:{origen}", max(confirmado, header.get("ack", 0)))
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction: conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return resumen
+
+def get_conflicts(incluir_resueltos=False):
+    database.init_db()
+    conn = sqlite3.connect(database.DB_NAME)
+    query = "SELECT * FROM sync_conflictos" + ("" if incluir_resueltos else " WHERE resuelto = 0")
+    df = pd.read_sql_query(query, conn)
+    conn.close()
+    return df
+
+def resolve_conflicts(ids):
+    """Marca como resueltos los conflictos indicados (la fila local ya quedó corregida a mano)."""
+    if not ids: return
+    conn = sqlite3.connect(database.DB_NAME)
+    conn.execute(f"UPDATE sync_conflictos SET resuelto = 1 WHERE id IN ({','.join(['?'] * len(ids))})", list(ids))
+    conn.commit()
+    conn.close()
+
+def sync_local(db_a, db_b, carpeta=".", estrategia="lww"):
+    """
+    Sincroniza dos archivos de base en ambos sentidos usando archivos delta en
+    `carpeta`. Útil para pruebas y para sincronizar una laptop conectada a la red.
+    Cada base usa su archivo por defecto; ARCHIVE_DB_NAME se ignora.
+    """
+    original = database.DB_NAME, database.ARCHIVE_DB_NAME
+    # Cada base usa su propio archivo (<db>_archivo.db); uno compartido mezclaría
+    # los hallazgos archivados de ambas copias.
+    database.ARCHIVE_DB_NAME = None
+    try:
+        database.DB_NAME = db_a
+        nodo_a = node_id()
+        database.DB_NAME = db_b
+        nodo_b = node_id()
+        a_b = os.path.join(carpeta, f"delta_{nodo_a[:8]}_{nodo_b[:8]}.jsonl.gz")
+        b_a = os.path.join(carpeta, f"delta_{nodo_b[:8]}_{nodo_a[:8]}.jsonl.gz")
+
+        database.DB_NAME = db_a
+        export_delta(a_b, nodo_b)
+        database.DB_NAME = db_b
+        res_b = apply_delta(a_b, estrategia)
+        export_delta(b_a, nodo_a)
+        database.DB_NAME = db_a
+        res_a = apply_delta(b_a, estrategia)
+        return res_a, res_b
+    finally:
+        database.DB_NAME, database.ARCHIVE_DB_NAME = original
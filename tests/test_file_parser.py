@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import file_parser
+
+cv2 = pytest.importorskip("cv2")
+
+FILAS = [500 + i * 120 for i in range(7)]
+COLUMNAS = [150, 500, 1000, 1450]
+
+def pagina_con_tabla(angulo=-2.0):
+    """Página blanca (2000x1600) con una tabla de 6 filas y 3 columnas, ligeramente girada."""
+    img = np.full((2000, 1600), 255, np.uint8)
+    for y in FILAS:
+        cv2.line(img, (COLUMNAS[0], y), (COLUMNAS[-1], y), 0, 3)
+    for x in COLUMNAS:
+        cv2.line(img, (x, FILAS[0]), (x, FILAS[-1]), 0, 3)
+    M = cv2.getRotationMatrix2D((800, 1000), angulo, 1.0)
+    return cv2.warpAffine(img, M, (1600, 2000), borderValue=255)
+
+class LectorFalso:
+    """Sustituto de easyocr.Reader: encabezado 'Hallazgo' en la 2a columna y tres líneas de texto."""
+    def __init__(self):
+        self.llamadas = []
+
+    def readtext(self, img):
+        self.llamadas.append(img.shape)
+        if img.shape[0] < 200: # Fila de encabezado
+            return [([[400, 40], [600, 40], [600, 80], [400, 80]], "Hallazgo", 0.9)]
+        return [([[10, y], [300, y], [300, y + 30], [10, y + 30]], texto, 0.9)
+                for y, texto in [(10, "linea 1"), (50, "cont"), (150, "linea 2")]]
+
+def test_preprocess_page_endereza_y_recorta_la_tabla():
+    img, filas, columnas = file_parser.preprocess_page(pagina_con_tabla())
+    assert len(filas) == len(FILAS) and len(columnas) == len(COLUMNAS)
+    assert np.diff(filas) == pytest.approx([120] * 6, abs=4)
+    assert np.diff(columnas) == pytest.approx(np.diff(COLUMNAS), abs=4)
+    assert img.shape == pytest.approx((FILAS[-1] - FILAS[0], COLUMNAS[-1] - COLUMNAS[0]), abs=15)
+
+def test_deskew_no_toca_una_pagina_derecha():
+    derecha = pagina_con_tabla(angulo=0)
+    assert file_parser._deskew(derecha) is derecha
+
+def test_find_table_sin_tabla():
+    assert file_parser.find_table(np.full((1000, 800), 255, np.uint8)) is None
+
+def test_ocr_page_solo_lee_la_columna_de_hallazgos():
+    lector = LectorFalso()
+    textos, tiempos = file_parser.ocr_page(lector, pagina_con_tabla())
+    assert textos == ["linea 1 cont", "linea 2"]
+    assert set(tiempos) == {"preproceso", "ocr"}
+    # Encabezado completo, luego solo la columna 500-1000
+    assert lector.llamadas[1][1] == pytest.approx(COLUMNAS[2] - COLUMNAS[1], abs=4)
+
+def test_benchmark_usa_la_misma_resolucion(monkeypatch):
+    configs = []
+    def ocr_pdf_falso(file, config=None, stats=None):
+        configs.append(config)
+        stats.append({"pagina": 1, "total": 2.0 if config.get("preprocess") is False else 1.0})
+        return []
+    monkeypatch.setattr(file_parser, "ocr_pdf", ocr_pdf_falso)
+    df = file_parser.benchmark_ocr("acta.pdf", {"dpi": 200})
+    assert [c["dpi"] for c in configs] == [200, 200]
+    assert df["aceleracion"].tolist() == [2.0]
@@ -0,0 +1,166 @@
+import shutil
+import sqlite3
+import time
+import pytest
+import database
+import sync
+
+@pytest.fixture
+def nodos(tmp_path, monkeypatch):
+    """Central con un hallazgo inicial y dos laptops copiadas de ella (identidad propia)."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(database, "DB_NAME", "central.db")
+    monkeypatch.setattr(database, "ARCHIVE_DB_NAME", None)
+    database.init_db()
+    database.add_finding({"hallazgo": "Extintor vencido", "cedis": "Toluca", "fecha_hallazgo": "2025-01-02"})
+    for db in ("a.db", "c.db"):
+        shutil.copy("central.db", db)
+        usar(db)
+        sync.node_id(nuevo=True)
+    return "a.db", "central.db", "c.db"
+
+def usar(db):
+    database.DB_NAME = db
+    database.init_db()
+
+def estado(db):
+    conn = sqlite3.connect(db)
+    rows = conn.execute("SELECT uuid, version, hallazgo, cedis, estatus, responsable FROM hallazgos ORDER BY uuid").fetchall()
+    conn.close()
+    return rows
+
+def id_de(db, hallazgo):
+    usar(db)
+    return int(database.get_findings({"hallazgo": hallazgo}).id[0])
+
+def ronda(a, central, c, estrategia="lww"):
+    """Las laptops solo hablan con la central. Regresa lo aplicado en la ronda."""
+    aplicadas = 0
+    for laptop in (a, c, a):
+        for res in sync.sync_local(laptop, central, estrategia=estrategia):
+            aplicadas += res["aplicada"]
+    return aplicadas
+
+def converger(a, central, c, estrategia="lww"):
+    for _ in range(5):
+        if ronda(a, central, c, estrategia) == 0:
+            return
+    pytest.fail("La sincronización no se estabilizó")
+
+def test_tres_copias_convergen(nodos):
+    a, central, c = nodos
+    usar(a)
+    database.add_finding({"hallazgo": "Salida bloqueada", "cedis": "Xalapa", "fecha_hallazgo": "2025-02-01"})
+    usar(c)
+    database.add_finding({"hallazgo": "Sin señalética", "cedis": "León", "fecha_hallazgo": "2025-02-03"})
+    database.update_finding(id_de(c, "Extintor vencido"), {"responsable": "Ana"})
+    converger(a, central, c)
+
+    # Ediciones concurrentes sobre el mismo hallazgo: gana la más reciente
+    database.update_finding(id_de(a, "Salida bloqueada"), {"estatus": "En Proceso"})
+    time.sleep(0.01)
+    database.update_finding(id_de(c, "Salida bloqueada"), {"estatus": "Cerrado"})
+    database.delete_finding(id_de(central, "Sin señalética"))
+    converger(a, central, c)
+
+    assert estado(a) == estado(central) == estado(c)
+    assert {r[2]: r[4] for r in estado(a)} == {"Extintor vencido": "Abierto", "Salida bloqueada": "Cerrado"}
+    assert ronda(a, central, c) == 0
+
+def test_baja_contra_edicion_posterior_gana_la_edicion(nodos):
+    a, central, _ = nodos
+    database.delete_finding(id_de(a, "Extintor vencido"))
+    time.sleep(0.01)
+    database.update_finding(id_de(central, "Extintor vencido"), {"estatus": "Cerrado"})
+
+    sync.sync_local(a, central)
+    assert estado(a) == estado(central)
+    assert [r[4] for r in estado(a)] == ["Cerrado"]
+    assert sync.sync_local(a, central) == ({"aplicada": 0, "omitida": 0, "conflicto": 0},) * 2
+
+def test_edicion_contra_baja_posterior_gana_la_baja(nodos):
+    a, central, _ = nodos
+    database.update_finding(id_de(central, "Extintor vencido"), {"estatus": "Cerrado"})
+    time.sleep(0.01)
+    database.delete_finding(id_de(a, "Extintor vencido"))
+
+    sync.sync_local(a, central)
+    assert estado(a) == estado(central) == []
+
+def test_baja_concurrente_se_marca(nodos):
+    a, central, _ = nodos
+    database.delete_finding(id_de(a, "Extintor vencido"))
+    time.sleep(0.01)
+    database.update_finding(id_de(central, "Extintor vencido"), {"estatus": "Cerrado"})
+
+    sync.sync_local(a, central, estrategia="marcar")
+    for db in (a, central):
+        usar(db)
+        assert sync.get_conflicts().motivo.tolist() == ["baja concurrente"]
+
+def test_sync_local_usa_el_archivo_de_cada_base(nodos, tmp_path):
+    a, central, _ = nodos
+    database.ARCHIVE_DB_NAME = str(tmp_path / "compartido.db")
+    sync.sync_local(a, central)
+    assert database.ARCHIVE_DB_NAME == str(tmp_path / "compartido.db")
+    assert not (tmp_path / "compartido.db").exists()
+    assert (tmp_path / "a_archivo.db").exists() and (tmp_path / "central_archivo.db").exists()
+
+def test_gana_la_edicion_mas_reciente_aunque_tenga_menos_versiones(nodos):
+    a, central, _ = nodos
+    fila = id_de(central, "Extintor vencido")
+    database.update_finding(fila, {"responsable": "C2"})
+    database.update_finding(fila, {"responsable": "C3"})
+    time.sleep(0.01)
+    database.update_finding(id_de(a, "Extintor vencido"), {"responsable": "Laptop"})
+
+    sync.sync_local(a, central)
+    assert estado(a) == estado(central)
+    assert [r[5] for r in estado(a)] == ["Laptop"]
+
+def test_conflicto_marcado_no_se_pisa_con_ediciones_posteriores(nodos):
+    a, central, _ = nodos
+    database.update_finding(id_de(a, "Extintor vencido"), {"responsable": "LOCAL-A"})
+    fila = id_de(central, "Extintor vencido")
+    database.update_finding(fila, {"responsable": "C2"})
+    database.update_finding(fila, {"responsable": "C3"})
+
+    sync.sync_local(a, central, estrategia="marcar")
+    assert [r[5] for r in estado(a)] == ["LOCAL-A"]
+    assert [r[5] for r in estado(central)] == ["C3"]
+    for db in (a, central):
+        usar(db)
+        assert sync.get_conflicts().motivo.tolist() == ["edicion concurrente"]
+    # El conflicto guarda la versión remota más reciente
+    usar(a)
+    assert '"C3"' in sync.get_conflicts().remoto[0]
+
+def test_duplicado_se_marca_una_sola_vez(nodos):
+    a, central, _ = nodos
+    nuevo = {"hallazgo": "Salida bloqueada", "cedis": "Xalapa", "fecha_hallazgo": "2025-02-01"}
+    for db in (a, central):
+        usar(db)
+        database.add_finding(nuevo)
+    sync.sync_local(a, central)
+    database.update_finding(id_de(a, "Salida bloqueada"), {"estatus": "Cerrado"})
+    database.update_finding(id_de(central, "Salida bloqueada"), {"estatus": "En Proceso"})
+
+    res_a, res_b = sync.sync_local(a, central)
+    assert res_a["conflicto"] == res_b["conflicto"] == 0
+    for db in (a, central):
+        usar(db)
+        assert sync.get_conflicts().motivo.tolist() == ["duplicado"]
+
+def test_copia_sin_identificador_propio(nodos):
+    _, central, _ = nodos
+    shutil.copy(central, "b.db")
+    usar("b.db")
+    database.add_finding({"hallazgo": "Salida bloqueada", "cedis": "Xalapa", "fecha_hallazgo": "2025-02-01"})
+    with pytest.raises(ValueError, match="regenere"):
+        sync.sync_local("b.db", central)
+
+    usar("b.db")
+    sync.node_id(nuevo=True)
+    sync.sync_local("b.db", central)
+    assert estado("b.db") == estado(central)
+    assert sorted(r[2] for r in estado(central)) == ["Extintor vencido", "Salida bloqueada"]